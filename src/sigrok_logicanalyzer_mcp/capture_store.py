@@ -6,19 +6,34 @@ import os
 import shutil
 import tempfile
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sigrok_logicanalyzer_mcp.formatters import LineIndex
 
 
 class CaptureNotFoundError(Exception):
     """Raised when a capture ID doesn't exist in the store."""
 
 
-@dataclass
+# Sample exports kept indexed for get_raw_samples paging, in bytes of
+# LineIndex.nbytes; larger exports are re-read on every page.
+_MAX_LINE_INDEX_BYTES = 64 * 1024 * 1024
+
+# Decode output kept in memory in front of the on-disk cache files, in
+# characters; larger or older outputs are read back from disk.
+_MAX_DECODE_CACHE_CHARS = 16 * 1024 * 1024
+
+
+@dataclass(slots=True)
 class CaptureInfo:
     capture_id: str
     file_path: str
-    created_at: float
+    created_at_ns: int  # time.monotonic_ns() at creation
     description: str = ""
+    size_bytes: int | None = None  # None until recorded after capture
 
 
 class CaptureStore:
@@ -28,6 +43,19 @@ class CaptureStore:
     can be referenced from subsequent tool calls (decode, export, etc.).
     """
 
+    __slots__ = (
+        "_base_dir",
+        "_captures",
+        "_counter",
+        "_decode_cache",
+        "_decode_cache_chars",
+        "_line_index_bytes",
+        "_line_indexes",
+        "_mono_anchor_ns",
+        "_owns_dir",
+        "_wall_anchor",
+    )
+
     def __init__(self, base_dir: str | None = None) -> None:
         if base_dir is None:
             self._base_dir = tempfile.mkdtemp(prefix="sigrok_logicanalyzer_mcp_")
@@ -40,6 +68,20 @@ class CaptureStore:
         self._captures: dict[str, CaptureInfo] = {}
         self._counter = 0
 
+        # Captures are stamped with the monotonic clock; this anchor converts
+        # those stamps back to wall-clock time when listing.
+        self._wall_anchor = time.time()
+        self._mono_anchor_ns = time.monotonic_ns()
+
+        # Recently paged sample exports, keyed by (capture_id, format, channels).
+        self._line_indexes: OrderedDict[tuple, LineIndex] = OrderedDict()
+        self._line_index_bytes = 0
+
+        # Recently used part of the on-disk decode cache, keyed by
+        # (capture_id, name).
+        self._decode_cache: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self._decode_cache_chars = 0
+
     @property
     def base_dir(self) -> str:
         return self._base_dir
@@ -57,7 +99,7 @@ class CaptureStore:
         self._captures[capture_id] = CaptureInfo(
             capture_id=capture_id,
             file_path=file_path,
-            created_at=time.time(),
+            created_at_ns=time.monotonic_ns(),
             description=description,
         )
         return capture_id, file_path
@@ -71,37 +113,105 @@ class CaptureStore:
             )
         return self._captures[capture_id]
 
+    def record_size(self, capture_id: str, size_bytes: int) -> None:
+        """Remember the .sr file size so listings don't need to stat it."""
+        self.get(capture_id).size_bytes = size_bytes
+
     def cache_decode(self, capture_id: str, decoder: str, raw_output: str) -> str:
         """Cache raw decode output alongside the capture. Returns the cache path."""
         self.get(capture_id)  # raises CaptureNotFoundError if missing
         cache_path = os.path.join(self._base_dir, f"{capture_id}_{decoder}_raw.txt")
         with open(cache_path, "w", encoding="utf-8") as f:
             f.write(raw_output)
+        self._remember_decode((capture_id, decoder), raw_output)
         return cache_path
 
     def get_cached_decode(self, capture_id: str, decoder: str) -> str | None:
         """Return cached raw decode output, or None if not cached."""
         if capture_id not in self._captures:
             return None
+        key = (capture_id, decoder)
+        cached = self._decode_cache.get(key)
+        if cached is not None:
+            self._decode_cache.move_to_end(key)
+            return cached
         cache_path = os.path.join(self._base_dir, f"{capture_id}_{decoder}_raw.txt")
         if os.path.exists(cache_path):
             with open(cache_path, "r", encoding="utf-8") as f:
-                return f.read()
+                cached = f.read()
+            self._remember_decode(key, cached)
+            return cached
         return None
 
+    def _remember_decode(self, key: tuple[str, str], raw_output: str) -> None:
+        """Keep decode output in memory, evicting the least recently used."""
+        old = self._decode_cache.pop(key, None)
+        if old is not None:
+            self._decode_cache_chars -= len(old)
+        if len(raw_output) > _MAX_DECODE_CACHE_CHARS:
+            return
+        self._decode_cache[key] = raw_output
+        self._decode_cache_chars += len(raw_output)
+        while self._decode_cache_chars > _MAX_DECODE_CACHE_CHARS:
+            _, evicted = self._decode_cache.popitem(last=False)
+            self._decode_cache_chars -= len(evicted)
+
+    def get_line_index(
+        self, capture_id: str, output_format: str, channels: str | None
+    ) -> LineIndex | None:
+        """Return the cached line index of a sample export, or None."""
+        key = (capture_id, output_format, channels)
+        index = self._line_indexes.get(key)
+        if index is not None:
+            self._line_indexes.move_to_end(key)
+        return index
+
+    def cache_line_index(
+        self,
+        capture_id: str,
+        output_format: str,
+        channels: str | None,
+        index: LineIndex,
+    ) -> None:
+        """Keep a sample export's line index for subsequent window reads.
+
+        Each index holds the whole export text, so the cache is bounded by
+        total size, evicting the least recently used.
+        """
+        self.get(capture_id)  # raises CaptureNotFoundError if missing
+        key = (capture_id, output_format, channels)
+        old = self._line_indexes.pop(key, None)
+        if old is not None:
+            self._line_index_bytes -= old.nbytes
+        if index.nbytes > _MAX_LINE_INDEX_BYTES:
+            return
+        self._line_indexes[key] = index
+        self._line_index_bytes += index.nbytes
+        while self._line_index_bytes > _MAX_LINE_INDEX_BYTES:
+            _, evicted = self._line_indexes.popitem(last=False)
+            self._line_index_bytes -= evicted.nbytes
+
     def list_captures(self) -> list[dict]:
-        """List all captures with metadata."""
+        """List all captures with metadata.
+
+        Safe to call from a worker thread: it iterates over a snapshot, so a
+        capture added meanwhile on the event loop doesn't break the loop.
+        """
         result = []
-        for info in self._captures.values():
-            size = 0
-            if os.path.exists(info.file_path):
-                size = os.path.getsize(info.file_path)
+        for info in list(self._captures.values()):
+            size = info.size_bytes
+            if size is None:
+                try:
+                    size = os.stat(info.file_path).st_size
+                except OSError:
+                    size = 0
             result.append(
                 {
                     "id": info.capture_id,
                     "file_path": info.file_path,
                     "size_bytes": size,
-                    "created_at": info.created_at,
+                    "created_at": self._wall_anchor
+                    + (info.created_at_ns - self._mono_anchor_ns) / 1e9,
                     "description": info.description,
                 }
             )
@@ -109,6 +219,24 @@ class CaptureStore:
 
     def cleanup(self) -> None:
         """Remove all temp files and the base directory if we own it."""
-        if self._owns_dir and os.path.exists(self._base_dir):
-            shutil.rmtree(self._base_dir, ignore_errors=True)
+        if self._owns_dir:
+            # The store directory is flat, so a single scandir + unlink pass
+            # avoids rmtree's per-entry lstat calls.
+            try:
+                with os.scandir(self._base_dir) as entries:
+                    for entry in entries:
+                        try:
+                            os.unlink(entry.path)
+                        except OSError:
+                            pass
+                os.rmdir(self._base_dir)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # Something unexpected (e.g. a subdirectory) is in the way.
+                shutil.rmtree(self._base_dir, ignore_errors=True)
         self._captures.clear()
+        self._line_indexes.clear()
+        self._line_index_bytes = 0
+        self._decode_cache.clear()
+        self._decode_cache_chars = 0
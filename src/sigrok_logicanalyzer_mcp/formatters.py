@@ -8,44 +8,100 @@ can reason about effectively.
 from __future__ import annotations
 
 import re
+from array import array
 from collections import Counter
+from itertools import accumulate
 
 
-def format_decoded_protocol(raw_output: str, max_lines: int = 200) -> str:
+def format_decoded_protocol(raw_output: str | bytes, max_lines: int = 200) -> str:
     """Clean up and truncate protocol decoder output.
 
     Adds a summary header with the total transaction count and indicates
     if output was truncated.
     """
-    lines = raw_output.strip().splitlines()
-    total = len(lines)
-
-    if total == 0:
+    if isinstance(raw_output, bytes):
+        raw_output = raw_output.decode("utf-8", errors="replace")
+    text = raw_output.strip()
+    if not text:
         return "No protocol data decoded. Check channel mapping and decoder settings."
+    if "\r" in text:
+        text = text.replace("\r\n", "\n")
+
+    # Decoder output can run to millions of lines; count and slice by
+    # newline offsets rather than building a list of every line.
+    total = text.count("\n") + 1
 
     if total <= max_lines:
-        return f"Decoded {total} annotations:\n\n" + "\n".join(lines)
+        return f"Decoded {total} annotations:\n\n" + text
 
-    truncated = lines[:max_lines]
+    end = -1
+    for _ in range(max_lines):
+        end = text.find("\n", end + 1)
+    # max_lines <= 0 shows no lines; text[:-1] would be nearly everything.
+    shown = text[:end] if end >= 0 else ""
     return (
         f"Decoded {total} annotations (showing first {max_lines}):\n\n"
-        + "\n".join(truncated)
+        + shown
         + f"\n\n... ({total - max_lines} more lines truncated)"
     )
 
 
+class LineIndex:
+    """Line-start offsets into one sigrok text export.
+
+    Building the index is one C-level split over the output; afterwards any
+    window of lines is a single slice, so paging through a large capture
+    costs O(window) per call instead of re-splitting the whole export.
+    """
+
+    __slots__ = ("_starts", "_text")
+
+    def __init__(self, raw_output: str | bytes) -> None:
+        text = raw_output.strip()
+        if isinstance(text, bytes):
+            newline, crlf = b"\n", b"\r\n"
+        else:
+            newline, crlf = "\n", "\r\n"
+        if crlf in text:
+            text = text.replace(crlf, newline)
+        self._text = text
+        if text:
+            # Offset of each line start, plus one past the end of the text.
+            lengths = map(len, text.split(newline))
+            self._starts = array("q", accumulate(map((1).__add__, lengths), initial=0))
+        else:
+            self._starts = array("q", [0])
+
+    def __len__(self) -> int:
+        return len(self._starts) - 1
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the index: the text plus its offsets."""
+        return len(self._text) + self._starts.itemsize * len(self._starts)
+
+    def window(self, start: int, end: int) -> str:
+        """Return lines [start, end) joined by newlines."""
+        chunk = self._text[self._starts[start] : self._starts[end] - 1]
+        if isinstance(chunk, bytes):
+            return chunk.decode("utf-8", errors="replace")
+        return chunk
+
+
 def format_raw_samples(
-    raw_output: str,
+    raw_output: str | bytes | LineIndex,
     start_sample: int = 0,
     window_size: int = 1000,
 ) -> str:
     """Extract a window of raw samples from sigrok output.
 
     Works with bits/hex/csv output formats. Returns the requested window
-    with sample number annotations.
+    with sample number annotations. Pass a LineIndex to page through the
+    same export repeatedly without re-indexing it; bytes input is only
+    decoded for the returned window.
     """
-    lines = raw_output.strip().splitlines()
-    total = len(lines)
+    index = raw_output if isinstance(raw_output, LineIndex) else LineIndex(raw_output)
+    total = len(index)
 
     if total == 0:
         return "No sample data available."
@@ -53,16 +109,42 @@ def format_raw_samples(
     # Clamp window to available data
     start = max(0, min(start_sample, total - 1))
     end = min(start + window_size, total)
-    window = lines[start:end]
 
     header = (
         f"Samples {start}-{end - 1} of {total} total (showing {end - start} samples):\n"
     )
 
-    return header + "\n".join(window)
+    return header + index.window(start, end)
+
+
+# A bits-format data line: "A0:11111111 00001111". The label (everything
+# before the first colon) and the data are stripped at both ends only, so
+# labels keep inner spaces ("CS #"). Header lines never consist of a label
+# followed only by 0/1 and spaces, so they don't match.
+_BITS_LINE_RE = re.compile(
+    rb"^[^\S\n]*([^:\n]*?)[^\S\n]*:[^\S\n]*([01][01 ]*)[^\S\n]*$", re.MULTILINE
+)
+
+
+def _bit_stats(bits: str | bytes) -> tuple[int, int]:
+    """Return (high_count, edge_count) for a string of '0'/'1' samples.
+
+    Converts the whole string to one integer once: its popcount is the
+    number of high samples, and XORing it with itself shifted by one sample
+    marks the transitions. Both run in C over machine words instead of a
+    Python loop over characters.
+    """
+    n = len(bits)
+    if n == 0:
+        return 0, 0
+    value = int(bits, 2)
+    # Bit i of the XOR is set where sample i differs from its neighbour; the
+    # top bit compares the first sample with nothing and is masked off.
+    edges = ((value ^ (value >> 1)) & ((1 << (n - 1)) - 1)).bit_count()
+    return value.bit_count(), edges
 
 
-def summarize_capture_data(raw_output: str) -> str:
+def summarize_capture_data(raw_output: str | bytes) -> str:
     """Generate a high-level summary of captured sample data.
 
     Analyzes the bits-format output to report:
@@ -77,32 +159,21 @@ def summarize_capture_data(raw_output: str) -> str:
         A0:11111111 00001111 ...
         ...
     Each line has a channel label prefix and groups of 8 bits separated by spaces.
+
+    The output is ASCII, so parsing works on bytes and skips the Unicode
+    machinery of the str methods; str input is encoded first.
     """
-    lines = raw_output.strip().splitlines()
-    if not lines:
+    if isinstance(raw_output, str):
+        raw_output = raw_output.encode("utf-8", errors="replace")
+    if not raw_output.strip():
         return "No sample data to summarize."
 
-    # Parse sigrok bits format: collect bit strings per channel name
-    channel_bits: dict[str, list[str]] = {}
-    channel_order: list[str] = []
-
-    for line in lines:
-        # Match lines like "A0:11111111 00001111 ..."
-        if ":" not in line:
-            continue
-        label, _, data = line.partition(":")
-        label = label.strip()
-        data = data.strip()
-        # Skip non-data lines (e.g. header lines with colons)
-        if not data or not all(c in "01 " for c in data):
-            continue
-        bits = data.replace(" ", "")
-        if not bits:
-            continue
-        if label not in channel_bits:
-            channel_bits[label] = []
-            channel_order.append(label)
-        channel_bits[label].append(bits)
+    # Parse sigrok bits format: collect bit strings per channel name. One
+    # regex pass over the whole buffer picks out the "label:bits" lines and
+    # skips header lines without looking at every character in Python.
+    channel_bits: dict[bytes, list[bytes]] = {}
+    for m in _BITS_LINE_RE.finditer(raw_output):
+        channel_bits.setdefault(m.group(1), []).append(m.group(2))
 
     if not channel_bits:
         return "No sample data to summarize (could not parse channel data)."
@@ -111,21 +182,26 @@ def summarize_capture_data(raw_output: str) -> str:
 
     # Compute per-channel stats
     header_parts = []
-    for ch_name in channel_order:
-        all_bits = "".join(channel_bits[ch_name])
+    for ch_name, chunks in channel_bits.items():
+        # Group separators are dropped once per channel, not once per line.
+        all_bits = b"".join(chunks).replace(b" ", b"")
         total = len(all_bits)
-        high_count = all_bits.count("1")
-        # Count edges (transitions)
-        edge_count = 0
-        for i in range(1, total):
-            if all_bits[i] != all_bits[i - 1]:
-                edge_count += 1
-        header_parts.append((ch_name, total, high_count, edge_count))
+        # Idle channels (common in triggered captures) are all-0 or all-1:
+        # `in` stops at the first differing sample and no counting is needed.
+        if b"1" not in all_bits:
+            high_count, edge_count = 0, 0
+        elif b"0" not in all_bits:
+            high_count, edge_count = total, 0
+        else:
+            high_count, edge_count = _bit_stats(all_bits)
+        header_parts.append(
+            (ch_name.decode("utf-8", errors="replace"), total, high_count, edge_count)
+        )
 
     total_samples = header_parts[0][1] if header_parts else 0
 
     summary_lines.append(
-        f"Capture summary: {total_samples} samples, {len(channel_order)} channels"
+        f"Capture summary: {total_samples} samples, {len(channel_bits)} channels"
     )
     summary_lines.append("")
     summary_lines.append(f"{'Channel':<10} {'High %':>8} {'Edges':>8}   {'Activity'}")
@@ -153,21 +229,21 @@ def summarize_capture_data(raw_output: str) -> str:
 # ---------------------------------------------------------------------------
 
 
-def _parse_annotations(raw_output: str) -> list[str]:
+# Lines look like "i2c-1: Start" or "uart-1: 48": everything after the first
+# ": " is the value; lines without a (non-blank) value don't match.
+_ANNOTATION_RE = re.compile(r"^[^\n]*?: ([^\n]*?\S)[^\S\n]*$", re.MULTILINE)
+
+
+def _parse_annotations(raw_output: str | bytes) -> list[str]:
     """Strip the decoder prefix (e.g. 'i2c-1: ') and return annotation values."""
-    annotations = []
-    for line in raw_output.strip().splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        # Lines look like "i2c-1: Start" or "uart-1: 48"
-        _, _, value = line.partition(": ")
-        if value:
-            annotations.append(value)
-    return annotations
+    if isinstance(raw_output, bytes):
+        raw_output = raw_output.decode("utf-8", errors="replace")
+    return _ANNOTATION_RE.findall(raw_output)
 
 
-def format_i2c_transactions(raw_output: str, max_transactions: int = 500) -> str:
+def format_i2c_transactions(
+    raw_output: str | bytes, max_transactions: int = 500
+) -> str:
     """Group filtered I2C annotations into compact transaction summaries.
 
     Expects output from sigrok-cli with the I2C summary annotation filter
@@ -249,7 +325,9 @@ def format_i2c_transactions(raw_output: str, max_transactions: int = 500) -> str
     return "\n".join(lines)
 
 
-def format_spi_transactions(raw_output: str, max_transactions: int = 500) -> str:
+def format_spi_transactions(
+    raw_output: str | bytes, max_transactions: int = 500
+) -> str:
     """Group filtered SPI annotations into compact transfer summaries.
 
     Expects output with mosi-data, miso-data, mosi-transfer, miso-transfer.
@@ -305,7 +383,28 @@ def format_spi_transactions(raw_output: str, max_transactions: int = 500) -> str
     return "\n".join(lines)
 
 
-def format_uart_transactions(raw_output: str, max_bytes: int = 2000) -> str:
+# Maps every byte to itself if printable ASCII, otherwise to ".".
+_PRINTABLE_TABLE = bytes(b if 0x20 <= b < 0x7F else 0x2E for b in range(256))
+
+
+def _render_ascii(values: list[str]) -> str:
+    """Render hex byte values as ASCII, or "" if any value isn't valid hex."""
+    try:
+        octets = bytes.fromhex(" ".join(values))
+    except ValueError:
+        octets = b""
+    if len(octets) == len(values) and "" not in values:
+        return octets.translate(_PRINTABLE_TABLE).decode("ascii")
+    # Values wider or narrower than one byte (e.g. 9-bit frames)
+    try:
+        return "".join(
+            chr(n) if 0x20 <= n < 0x7F else "." for n in (int(v, 16) for v in values)
+        )
+    except ValueError:
+        return ""
+
+
+def format_uart_transactions(raw_output: str | bytes, max_bytes: int = 2000) -> str:
     """Group filtered UART annotations into TX/RX byte streams.
 
     Expects output with rx-data and tx-data annotations.
@@ -356,14 +455,7 @@ def format_uart_transactions(raw_output: str, max_bytes: int = 2000) -> str:
             break
         prefix = "TX>" if direction == "TX" else "RX<"
         hex_str = " ".join(data)
-        # Try to render as ASCII where possible
-        ascii_str = ""
-        try:
-            ascii_str = "".join(
-                chr(int(b, 16)) if 0x20 <= int(b, 16) < 0x7F else "." for b in data
-            )
-        except ValueError:
-            pass
+        ascii_str = _render_ascii(data)
         if ascii_str:
             lines.append(f'{prefix} {hex_str}  "{ascii_str}"')
         else:
@@ -373,7 +465,9 @@ def format_uart_transactions(raw_output: str, max_bytes: int = 2000) -> str:
     return "\n".join(lines)
 
 
-def format_can_transactions(raw_output: str, max_transactions: int = 500) -> str:
+def format_can_transactions(
+    raw_output: str | bytes, max_transactions: int = 500
+) -> str:
     """Group filtered CAN annotations into compact frame summaries.
 
     Expects output with annotation filter:
@@ -457,7 +551,9 @@ def format_can_transactions(raw_output: str, max_transactions: int = 500) -> str
     return "\n".join(lines)
 
 
-def format_onewire_transactions(raw_output: str, max_transactions: int = 500) -> str:
+def format_onewire_transactions(
+    raw_output: str | bytes, max_transactions: int = 500
+) -> str:
     """Group filtered 1-Wire network annotations into transaction summaries.
 
     Expects output with annotation filter: onewire_network
@@ -520,7 +616,9 @@ def format_onewire_transactions(raw_output: str, max_transactions: int = 500) ->
     return "\n".join(lines)
 
 
-def format_mdio_transactions(raw_output: str, max_transactions: int = 500) -> str:
+def format_mdio_transactions(
+    raw_output: str | bytes, max_transactions: int = 500
+) -> str:
     """Format filtered MDIO annotations into compact read/write summaries.
 
     Expects output with annotation filter: mdio=decode
@@ -553,7 +651,9 @@ def format_mdio_transactions(raw_output: str, max_transactions: int = 500) -> st
     return "\n".join(lines)
 
 
-def format_usb_transactions(raw_output: str, max_transactions: int = 500) -> str:
+def format_usb_transactions(
+    raw_output: str | bytes, max_transactions: int = 500
+) -> str:
     """Group filtered USB packet annotations, skipping SOFs.
 
     Expects output with annotation filter: usb_packet
@@ -575,23 +675,18 @@ def format_usb_transactions(raw_output: str, max_transactions: int = 500) -> str
 
     for ann in annotations:
         # Skip low-level fields
-        if (
-            ann.startswith("SYNC:")
-            or ann.startswith("CRC")
-            or ann.startswith("PID:")
-            or ann.startswith("Frame:")
-        ):
+        if ann.startswith(("SYNC:", "CRC", "PID:", "Frame:")):
             continue
         # SOF summary line: "SOF 1128"
         if ann.startswith("SOF "):
             sof_count += 1
             continue
         # Token packets: "IN ADDR 2 EP 1", "OUT ADDR 0 EP 0", "SETUP ADDR 0 EP 0"
-        if ann.startswith("IN ") or ann.startswith("OUT ") or ann.startswith("SETUP "):
+        if ann.startswith(("IN ", "OUT ", "SETUP ")):
             _flush()
             current_parts.append(ann)
         # Data packets: "DATA0 [ 00 01 00 00 ]"
-        elif ann.startswith("DATA0") or ann.startswith("DATA1"):
+        elif ann.startswith(("DATA0", "DATA1")):
             current_parts.append(ann)
         # Handshake
         elif ann in ("ACK", "NAK", "STALL"):
@@ -609,7 +704,9 @@ def format_usb_transactions(raw_output: str, max_transactions: int = 500) -> str
     return "\n".join(lines)
 
 
-def format_dcf77_transactions(raw_output: str, max_transactions: int = 500) -> str:
+def format_dcf77_transactions(
+    raw_output: str | bytes, max_transactions: int = 500
+) -> str:
     """Format filtered DCF77 annotations into a time/date summary.
 
     Expects output with annotation filter:
@@ -644,7 +741,9 @@ def format_dcf77_transactions(raw_output: str, max_transactions: int = 500) -> s
     return "\n".join(lines)
 
 
-def format_am230x_transactions(raw_output: str, max_transactions: int = 500) -> str:
+def format_am230x_transactions(
+    raw_output: str | bytes, max_transactions: int = 500
+) -> str:
     """Format filtered AM230x (DHT) annotations into sensor readings.
 
     Expects output with annotation filter: am230x=humidity:temperature:checksum
@@ -679,7 +778,9 @@ def format_am230x_transactions(raw_output: str, max_transactions: int = 500) ->
     return "\n".join(lines)
 
 
-def format_avr_isp_transactions(raw_output: str, max_transactions: int = 500) -> str:
+def format_avr_isp_transactions(
+    raw_output: str | bytes, max_transactions: int = 500
+) -> str:
     """Format filtered AVR ISP annotations into operation summaries.
 
     Expects output with annotation filter: avr_isp
@@ -713,7 +814,9 @@ def format_avr_isp_transactions(raw_output: str, max_transactions: int = 500) ->
     return "\n".join(lines)
 
 
-def format_spiflash_transactions(raw_output: str, max_transactions: int = 500) -> str:
+def format_spiflash_transactions(
+    raw_output: str | bytes, max_transactions: int = 500
+) -> str:
     """Format filtered SPI Flash annotations into command summaries.
 
     Expects output with annotation filter: spiflash
@@ -756,7 +859,9 @@ def format_spiflash_transactions(raw_output: str, max_transactions: int = 500) -
     return "\n".join(lines)
 
 
-def format_sdcard_transactions(raw_output: str, max_transactions: int = 500) -> str:
+def format_sdcard_transactions(
+    raw_output: str | bytes, max_transactions: int = 500
+) -> str:
     """Format filtered SD Card annotations into command summaries.
 
     Expects output with annotation filter covering command classes.
@@ -781,7 +886,9 @@ def format_sdcard_transactions(raw_output: str, max_transactions: int = 500) ->
     return "\n".join(lines)
 
 
-def format_z80_transactions(raw_output: str, max_transactions: int = 500) -> str:
+def format_z80_transactions(
+    raw_output: str | bytes, max_transactions: int = 500
+) -> str:
     """Format filtered Z80 annotations into instruction/memory operation summaries.
 
     Expects output with annotation filter: z80=memrd:memwr:iord:iowr:instr
@@ -800,7 +907,9 @@ def format_z80_transactions(raw_output: str, max_transactions: int = 500) -> str
     return "\n".join(lines)
 
 
-def format_arm_itm_transactions(raw_output: str, max_transactions: int = 500) -> str:
+def format_arm_itm_transactions(
+    raw_output: str | bytes, max_transactions: int = 500
+) -> str:
     """Format ARM ITM annotations. Untested — ARM ITM stacks on UART."""
     annotations = _parse_annotations(raw_output)
     if not annotations:
@@ -835,7 +944,7 @@ _TRANSACTION_FORMATTERS = {
 
 
 def format_decoded_summary(
-    raw_output: str, protocol: str, max_transactions: int = 500
+    raw_output: str | bytes, protocol: str, max_transactions: int = 500
 ) -> str:
     """Format decoded output as a compact transaction summary.
 
@@ -11,20 +11,26 @@ Usage:
 
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
+import operator
 import os
+import re
+import time
+from collections.abc import Callable
 from contextlib import asynccontextmanager
-from dataclasses import dataclass
+from typing import Any
 
+import anyio
 from mcp.server.fastmcp import FastMCP, Context
 
 from sigrok_logicanalyzer_mcp.capture_store import CaptureStore, CaptureNotFoundError
 from sigrok_logicanalyzer_mcp import sigrok_cli
-from sigrok_logicanalyzer_mcp.formatters import (
-    format_decoded_protocol,
-    format_decoded_summary,
-    format_raw_samples,
-    summarize_capture_data,
-)
+
+# formatters is imported inside the tools that use it: it isn't needed to
+# answer the initial MCP handshake, so loading it on first use keeps stdio
+# startup lean.
 
 
 # ---------------------------------------------------------------------------
@@ -32,9 +38,13 @@ from sigrok_logicanalyzer_mcp.formatters import (
 # ---------------------------------------------------------------------------
 
 
-@dataclass
 class AppContext:
-    store: CaptureStore
+    """Lifespan state shared by all tool calls."""
+
+    __slots__ = ("store",)
+
+    def __init__(self, store: CaptureStore) -> None:
+        self.store = store
 
 
 @asynccontextmanager
@@ -43,7 +53,12 @@ async def app_lifespan(server: FastMCP):
     try:
         yield AppContext(store=store)
     finally:
-        store.cleanup()
+        sigrok_cli.forget_results(store.base_dir)
+        # Removing a large store can take a while on slow disks; keep it off
+        # the event loop so shutdown doesn't stall other pending work. The
+        # shield lets the cleanup finish when shutdown cancels the lifespan.
+        with anyio.CancelScope(shield=True):
+            await asyncio.to_thread(store.cleanup)
 
 
 # ---------------------------------------------------------------------------
@@ -64,9 +79,48 @@ mcp = FastMCP(
 )
 
 
-def _get_store(ctx: Context) -> CaptureStore:
-    """Extract the CaptureStore from the lifespan context."""
-    return ctx.request_context.lifespan_context.store
+# Extract the CaptureStore from the lifespan context: _get_store(ctx).
+# attrgetter resolves the whole attribute chain in C on every tool call.
+_get_store: Callable[[Context], CaptureStore] = operator.attrgetter(
+    "request_context.lifespan_context.store"
+)
+
+
+class _TTLCache:
+    """Results that expire a fixed number of seconds after being stored.
+
+    Concurrent misses don't need a lock here: sigrok_cli already coalesces
+    identical in-flight scans and decoder listings into one subprocess.
+    """
+
+    __slots__ = ("_entries", "_ttl")
+
+    def __init__(self, ttl: float) -> None:
+        self._ttl = ttl
+        self._entries: dict[object, tuple[float, object]] = {}
+
+    def get(self, key: object) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() < entry[0]:
+            return entry[1]
+        return None
+
+    def put(self, key: object, value: object) -> None:
+        self._entries[key] = (time.monotonic() + self._ttl, value)
+
+
+# The decoder list is fixed for the life of the sigrok install; device scans
+# change only when hardware is plugged in, so a short TTL absorbs bursts.
+_decoder_cache = _TTLCache(ttl=60.0)
+_scan_cache = _TTLCache(ttl=2.0)
+
+
+def _file_size(path: str) -> int:
+    """Size of a capture file in bytes, 0 if sigrok-cli didn't write one."""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
 
 
 # ---------------------------------------------------------------------------
@@ -85,16 +139,18 @@ async def scan_devices(
                 ZeroPlus LAP-C devices. Other common drivers: "fx2lafw",
                 "saleae-logic-pro", "dreamsourcelab-dslogic".
     """
-    try:
-        devices = await sigrok_cli.scan_devices(driver=driver)
-    except sigrok_cli.DeviceNotFoundError as e:
-        return str(e)
-    except sigrok_cli.SigrokNotFoundError as e:
-        return str(e)
+    devices = _scan_cache.get(driver)
+    if devices is None:
+        try:
+            devices = await sigrok_cli.scan_devices(driver=driver)
+        except sigrok_cli.DeviceNotFoundError as e:
+            return str(e)
+        except sigrok_cli.SigrokNotFoundError as e:
+            return str(e)
+        _scan_cache.put(driver, devices)
 
     lines = [f"Found {len(devices)} device(s):"]
-    for dev in devices:
-        lines.append(f"  - {dev['description']}")
+    lines += [f"  - {dev['description']}" for dev in devices]
     return "\n".join(lines)
 
 
@@ -148,7 +204,8 @@ async def capture(
     except sigrok_cli.SigrokError as e:
         return f"Capture failed: {e}"
 
-    size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+    size = _file_size(file_path)
+    store.record_size(capture_id, size)
 
     parts = [
         f"Capture saved as {capture_id}",
@@ -174,15 +231,39 @@ async def capture(
     return "\n".join(parts)
 
 
+# One "key=val" item of a comma-separated list, surrounding whitespace ignored.
+# Items without "=" don't match and are skipped.
+_KV_RE = re.compile(r"\s*([^=]*?)\s*=\s*(.*?)\s*", re.DOTALL)
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_kv(text: str) -> tuple[tuple[str, str], ...]:
+    # Agents tend to repeat the same mapping/options strings across calls.
+    matches = map(_KV_RE.fullmatch, text.split(","))
+    return tuple(m.groups() for m in matches if m)
+
+
 def _parse_key_value_pairs(text: str) -> dict[str, str]:
     """Parse 'key=val,key=val' into a dict."""
-    result = {}
-    for pair in text.split(","):
-        pair = pair.strip()
-        if "=" in pair:
-            k, v = pair.split("=", 1)
-            result[k.strip()] = v.strip()
-    return result
+    return dict(_parse_kv(text))
+
+
+def _decode_cache_name(
+    protocol: str,
+    ch_map: dict[str, str] | None,
+    opts: dict[str, str] | None,
+    annotation_filter: str | None,
+) -> str:
+    """Name a decode result after everything that affects the output."""
+    params = repr(
+        (
+            sorted((ch_map or {}).items()),
+            sorted((opts or {}).items()),
+            annotation_filter,
+        )
+    )
+    digest = hashlib.blake2b(params.encode(), digest_size=8).hexdigest()
+    return f"{protocol}_{digest}"
 
 
 async def _run_decode(
@@ -195,6 +276,11 @@ async def _run_decode(
     detail: str,
 ) -> str:
     """Shared decode logic for decode_protocol and capture_and_decode."""
+    from sigrok_logicanalyzer_mcp.formatters import (
+        format_decoded_protocol,
+        format_decoded_summary,
+    )
+
     try:
         info = store.get(capture_id)
     except CaptureNotFoundError as e:
@@ -210,25 +296,24 @@ async def _run_decode(
     if is_summary and not annotation_filter:
         effective_filter = sigrok_cli.get_summary_annotation_filter(protocol)
 
-    # Check cache for raw mode (summary always re-filters)
-    if not is_summary:
-        cached = store.get_cached_decode(capture_id, protocol)
-        if cached and not annotation_filter and not options:
-            return format_decoded_protocol(cached)
-
-    try:
-        raw = await sigrok_cli.decode_protocol(
-            input_file=info.file_path,
-            decoder=protocol,
-            decoder_options=opts,
-            channel_mapping=ch_map,
-            annotation_filter=effective_filter,
-        )
-    except sigrok_cli.DecoderError as e:
-        return f"Decoder error: {e}"
-
-    # Cache the raw output
-    store.cache_decode(capture_id, protocol, raw)
+    # Cached output is only reused for the exact same decoder invocation
+    cache_name = _decode_cache_name(protocol, ch_map, opts, effective_filter)
+    raw = store.get_cached_decode(capture_id, cache_name)
+    if raw is None:
+        try:
+            raw = await sigrok_cli.decode_protocol(
+                input_file=info.file_path,
+                decoder=protocol,
+                decoder_options=opts,
+                channel_mapping=ch_map,
+                annotation_filter=effective_filter,
+                cache=False,  # the store keeps it, on disk and in memory
+            )
+        except sigrok_cli.DecoderError as e:
+            return f"Decoder error: {e}"
+
+        # Cache the raw output
+        store.cache_decode(capture_id, cache_name, raw)
 
     if is_summary:
         return format_decoded_summary(raw, protocol)
@@ -277,6 +362,58 @@ async def decode_protocol(
     )
 
 
+@mcp.tool()
+async def decode_protocols(
+    ctx: Context,
+    capture_id: str,
+    protocols: list[str],
+    channel_mappings: dict[str, str] | None = None,
+    options: dict[str, str] | None = None,
+    detail: str = "summary",
+) -> str:
+    """Run several protocol decoders on the same capture in one call.
+
+    The decoders run concurrently, so probing a capture for e.g. I2C, SPI
+    and UART at once takes about as long as the slowest single decode.
+
+    Args:
+        capture_id: ID from a previous capture (e.g. "cap_001").
+        protocols: Decoder names — e.g. ["i2c", "uart"].
+        channel_mappings: Channel mapping per protocol — e.g.
+                          {"i2c": "sda=A0,scl=A1", "uart": "rx=A2"}.
+        options: Decoder options per protocol — e.g. {"uart": "baudrate=115200"}.
+        detail: "summary" (default) — compact transaction view, or
+                "raw" — full sigrok-cli annotations.
+    """
+    if not protocols:
+        return 'No protocols given. Pass decoder names, e.g. ["i2c", "uart"].'
+
+    store = _get_store(ctx)
+    channel_mappings = channel_mappings or {}
+    options = options or {}
+    protocols = list(dict.fromkeys(protocols))
+
+    results = await asyncio.gather(
+        *(
+            _run_decode(
+                store,
+                capture_id,
+                protocol,
+                channel_mappings.get(protocol),
+                options.get(protocol),
+                None,
+                detail,
+            )
+            for protocol in protocols
+        )
+    )
+
+    sections = []
+    for protocol, result in zip(protocols, results):
+        sections.append(f"=== {protocol} ===\n{result}")
+    return "\n\n".join(sections)
+
+
 @mcp.tool()
 async def capture_and_decode(
     ctx: Context,
@@ -338,7 +475,8 @@ async def capture_and_decode(
     except sigrok_cli.SigrokError as e:
         return f"Capture failed: {e}"
 
-    size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+    size = _file_size(file_path)
+    store.record_size(capture_id, size)
 
     # 2. Decode
     decode_result = await _run_decode(
@@ -378,25 +516,28 @@ async def list_protocol_decoders(
     Args:
         filter: Optional search string to filter decoder list (case-insensitive).
     """
-    try:
-        decoders = await sigrok_cli.list_decoders()
-    except sigrok_cli.SigrokError as e:
-        return f"Error listing decoders: {e}"
+    # (id_lower, description_lower, id, description), lowercased once per fill
+    entries = _decoder_cache.get(None)
+    if entries is None:
+        try:
+            decoders = await sigrok_cli.list_decoders()
+        except sigrok_cli.SigrokError as e:
+            return f"Error listing decoders: {e}"
+        entries = [
+            (d["id"].lower(), d["description"].lower(), d["id"], d["description"])
+            for d in decoders
+        ]
+        _decoder_cache.put(None, entries)
 
     if filter:
         needle = filter.lower()
-        decoders = [
-            d
-            for d in decoders
-            if needle in d["id"].lower() or needle in d["description"].lower()
-        ]
+        entries = [e for e in entries if needle in e[0] or needle in e[1]]
 
-    if not decoders:
+    if not entries:
         return "No matching decoders found."
 
-    lines = [f"Available decoders ({len(decoders)}):"]
-    for d in decoders:
-        lines.append(f"  {d['id']:<20} {d['description']}")
+    lines = [f"Available decoders ({len(entries)}):"]
+    lines += [f"  {dec_id:<20} {description}" for _, _, dec_id, description in entries]
     return "\n".join(lines)
 
 
@@ -429,16 +570,32 @@ async def get_raw_samples(
 
     num_samples = min(num_samples, 5000)
 
-    try:
-        raw = await sigrok_cli.export_data(
-            input_file=info.file_path,
-            output_format=output_format,
-            channels=channels,
-        )
-    except sigrok_cli.SigrokError as e:
-        return f"Error reading samples: {e}"
+    from sigrok_logicanalyzer_mcp.formatters import LineIndex, format_raw_samples
+
+    # Paging through a capture re-reads the same export; index it once.
+    index = store.get_line_index(capture_id, output_format, channels)
+    if index is None:
+        try:
+            raw = await sigrok_cli.export_data(
+                input_file=info.file_path,
+                output_format=output_format,
+                channels=channels,
+                decode=False,
+                cache=False,  # the store keeps the index instead
+            )
+        except sigrok_cli.SigrokError as e:
+            return f"Error reading samples: {e}"
+        index = LineIndex(raw)
+        store.cache_line_index(capture_id, output_format, channels, index)
+
+    return format_raw_samples(index, start_sample=start_sample, window_size=num_samples)
+
 
-    return format_raw_samples(raw, start_sample=start_sample, window_size=num_samples)
+# analyze_capture renders the whole capture as text; stop reading there so a
+# huge capture can't pull gigabytes through the summary path. One extra byte
+# is requested so that an export of exactly this size isn't taken for a
+# truncated one.
+_ANALYZE_MAX_BYTES = 64 * 1024 * 1024
 
 
 @mcp.tool()
@@ -468,11 +625,25 @@ async def analyze_capture(
             input_file=info.file_path,
             output_format="bits",
             channels=channels,
+            max_bytes=_ANALYZE_MAX_BYTES + 1,
+            decode=False,
         )
     except sigrok_cli.SigrokError as e:
         return f"Error analyzing capture: {e}"
 
-    return summarize_capture_data(raw)
+    from sigrok_logicanalyzer_mcp.formatters import summarize_capture_data
+
+    if len(raw) <= _ANALYZE_MAX_BYTES:
+        return summarize_capture_data(raw)
+
+    # Drop the partial last line of the truncated export.
+    raw = raw[:_ANALYZE_MAX_BYTES]
+    summary = summarize_capture_data(raw[: raw.rfind(b"\n") + 1])
+    limit_mib = _ANALYZE_MAX_BYTES // (1024 * 1024)
+    return (
+        f"{summary}\n\nNote: only the first {limit_mib} MiB of sample data "
+        "were analyzed; the capture is larger."
+    )
 
 
 @mcp.tool()
@@ -482,15 +653,20 @@ async def list_captures(ctx: Context) -> str:
     Shows capture IDs, file sizes, and descriptions.
     """
     store = _get_store(ctx)
-    captures = store.list_captures()
+    # Captures without a recorded size are stat()ed; keep that filesystem
+    # access (slow on network mounts) off the event loop.
+    captures = await asyncio.to_thread(store.list_captures)
 
     if not captures:
         return "No captures yet. Use the capture tool to acquire signals."
 
+    # list_captures always fills in description ("" when none was given)
     lines = [f"Captures ({len(captures)}):"]
-    for cap in captures:
-        desc = f" — {cap['description']}" if cap.get("description") else ""
-        lines.append(f"  {cap['id']}  {cap['size_bytes']:>8} bytes{desc}")
+    lines += [
+        f"  {cap['id']}  {str(cap['size_bytes']).rjust(8)} bytes"
+        + (f" — {cap['description']}" if cap["description"] else "")
+        for cap in captures
+    ]
     return "\n".join(lines)
 
 
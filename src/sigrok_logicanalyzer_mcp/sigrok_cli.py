@@ -7,7 +7,15 @@ builds a command, runs it via asyncio subprocess, and parses the output.
 from __future__ import annotations
 
 import asyncio
+import functools
+import os
+import re
 import shutil
+import weakref
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Mapping
+from types import MappingProxyType
+from typing import Any
 
 
 # ---------------------------------------------------------------------------
@@ -44,7 +52,7 @@ _DEFAULT_TIMEOUT = 30  # seconds
 
 # Annotation filters that strip individual bit annotations for known protocols.
 # Used when detail="summary" to get only high-level decode output from sigrok-cli.
-_SUMMARY_ANNOTATION_FILTERS: dict[str, str] = {
+_SUMMARY_ANNOTATION_FILTERS: Mapping[str, str] = {
     # --- Tested with example .sr files ---
     "i2c": "i2c=start:repeat-start:stop:ack:nack:address-read:address-write:data-read:data-write",
     "spi": "spi=mosi-data:miso-data:mosi-transfer:miso-transfer",
@@ -167,14 +175,25 @@ _SUMMARY_ANNOTATION_FILTERS: dict[str, str] = {
     "i2cfilter": "i2cfilter",  # untested
 }
 
+# The table is only ever read: freeze it against accidental mutation and
+# bind the lookup once.
+_SUMMARY_ANNOTATION_FILTERS = MappingProxyType(_SUMMARY_ANNOTATION_FILTERS)
+_get_summary_filter = _SUMMARY_ANNOTATION_FILTERS.get
+
 
 def get_summary_annotation_filter(decoder: str) -> str | None:
     """Return the default annotation filter for summary mode, or None."""
-    return _SUMMARY_ANNOTATION_FILTERS.get(decoder)
+    return _get_summary_filter(decoder)
 
 
+@functools.lru_cache(maxsize=1)
 def _find_sigrok_cli() -> str:
-    """Verify sigrok-cli is available and return its path."""
+    """Verify sigrok-cli is available and return its path.
+
+    The lookup walks PATH, so the result is cached for the life of the
+    process. A failed lookup raises and is therefore not cached: installing
+    sigrok-cli while the server is running takes effect on the next call.
+    """
     path = shutil.which(_SIGROK_CLI)
     if path is None:
         raise SigrokNotFoundError(
@@ -184,14 +203,237 @@ def _find_sigrok_cli() -> str:
     return path
 
 
+# Calls currently running, keyed by operation. Concurrent identical requests
+# (e.g. an agent firing several scans in parallel) share one subprocess.
+_inflight: dict[tuple, asyncio.Future] = {}
+
+
+async def _single_flight(key: tuple, factory: Callable[[], Awaitable[Any]]) -> Any:
+    """Run factory() once for all concurrent callers using the same key."""
+    fut = _inflight.get(key)
+    if fut is None:
+        fut = asyncio.ensure_future(factory())
+        _inflight[key] = fut
+        fut.add_done_callback(lambda _: _inflight.pop(key, None))
+    # shield: one caller being cancelled must not cancel the shared call
+    return await asyncio.shield(fut)
+
+
+def _prefetch(path: str) -> None:
+    """Hint the kernel to read a capture file into the page cache.
+
+    Decoding and exporting re-read the whole .sr file on every call; asking
+    for readahead up front keeps repeat analyses of large captures off the
+    disk. A no-op where posix_fadvise isn't available (macOS, Windows).
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class _ResultCache:
+    """Least-recently-used sigrok-cli output, bounded by its total size.
+
+    Keys start with the input file path so that entries for a directory of
+    captures can be dropped once those files are deleted.
+    """
+
+    __slots__ = ("_entries", "_max_bytes", "_size")
+
+    def __init__(self, max_bytes: int) -> None:
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, bytes] = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple) -> bytes | None:
+        output = self._entries.get(key)
+        if output is not None:
+            self._entries.move_to_end(key)
+        return output
+
+    def put(self, key: tuple, output: bytes) -> None:
+        if len(output) > self._max_bytes:
+            return  # would evict everything else; not worth keeping
+        self._pop(key)
+        self._entries[key] = output
+        self._size += len(output)
+        while self._size > self._max_bytes:
+            self._size -= len(self._entries.popitem(last=False)[1])
+
+    def discard_under(self, directory: str) -> None:
+        prefix = os.path.join(directory, "")
+        for key in [k for k in self._entries if k[0].startswith(prefix)]:
+            self._pop(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+    def _pop(self, key: tuple) -> None:
+        output = self._entries.pop(key, None)
+        if output is not None:
+            self._size -= len(output)
+
+
+# Output of recent decode/export runs. An agent iterating on a capture
+# repeats the same decode many times; the key includes the file's mtime and
+# size, so a capture file that is rewritten is never served stale output.
+# Bounded by bytes, not entries: a single export can be tens of MB.
+_RESULT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+_result_cache = _ResultCache(_RESULT_CACHE_MAX_BYTES)
+
+
+def forget_results(directory: str) -> None:
+    """Drop cached output for capture files inside directory.
+
+    Call when those files are deleted so their output isn't kept alive.
+    """
+    _result_cache.discard_under(directory)
+
+
+async def _run_on_file(
+    input_file: str,
+    args: list[str],
+    timeout: float,
+    max_bytes: int | None = None,
+    cache: bool = True,
+) -> bytes:
+    """Run sigrok-cli on an existing capture file, reusing cached output.
+
+    Output is cached undecoded so str and bytes callers share entries.
+    Callers that keep the result themselves pass cache=False; concurrent
+    identical runs are still shared.
+    """
+    try:
+        st = os.stat(input_file)
+    except OSError:
+        # Let sigrok-cli report the missing file.
+        return await _run_bytes(args, timeout=timeout, max_bytes=max_bytes)
+
+    key = (input_file, st.st_mtime_ns, st.st_size, tuple(args), max_bytes)
+    cached = _result_cache.get(key) if cache else None
+    if cached is not None:
+        return cached
+
+    async def run() -> bytes:
+        _prefetch(input_file)
+        output = await _run_bytes(args, timeout=timeout, max_bytes=max_bytes)
+        if cache:
+            _result_cache.put(key, output)
+        return output
+
+    return await _single_flight(("run", *key), run)
+
+
+# Concurrent sigrok-cli processes across all tool calls. Independent calls
+# overlap on separate cores; beyond one per core they only contend. Captures
+# are exempt: they wait on the device, not on a core.
+_MAX_SUBPROCESSES = max(2, os.cpu_count() or 2)
+_slots: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _subprocess_slots() -> asyncio.Semaphore:
+    """Return the sigrok-cli concurrency limit for the running event loop.
+
+    A semaphore is bound to the loop it first waits on, so each loop (one
+    per test, normally just the server's) gets its own.
+    """
+    loop = asyncio.get_running_loop()
+    sem = _slots.get(loop)
+    if sem is None:
+        sem = _slots[loop] = asyncio.Semaphore(_MAX_SUBPROCESSES)
+    return sem
+
+
+_READ_CHUNK = 64 * 1024
+
+
+async def _read_all(
+    stream: asyncio.StreamReader, limit: int | None = None
+) -> bytearray:
+    """Drain a subprocess pipe into one growing buffer.
+
+    communicate() collects chunks and joins them at the end, briefly holding
+    the output twice; large exports (several MB of bits text) are appended
+    in place here instead. Reading stops early once more than limit bytes
+    are in; output of exactly limit bytes is still read to EOF.
+    """
+    buf = bytearray()
+    while chunk := await stream.read(_READ_CHUNK):
+        buf += chunk
+        if limit is not None and len(buf) > limit:
+            break
+    return buf
+
+
+async def _discard(stream: asyncio.StreamReader) -> None:
+    """Read a pipe to EOF, dropping the data.
+
+    Process.wait() only returns once the pipes are closed, so after killing
+    sigrok-cli its remaining output still has to be drained.
+    """
+    while await stream.read(_READ_CHUNK):
+        pass
+
+
 async def _run(
     args: list[str],
     timeout: float = _DEFAULT_TIMEOUT,
+    max_bytes: int | None = None,
+    throttle: bool = True,
 ) -> str:
     """Run sigrok-cli with the given arguments and return stdout.
 
     Raises SigrokError on non-zero exit code.
     """
+    stdout = await _run_bytes(
+        args, timeout=timeout, max_bytes=max_bytes, throttle=throttle
+    )
+    return stdout.decode("utf-8", errors="replace")
+
+
+async def _run_bytes(
+    args: list[str],
+    timeout: float = _DEFAULT_TIMEOUT,
+    max_bytes: int | None = None,
+    throttle: bool = True,
+) -> bytes:
+    """Run sigrok-cli and return stdout undecoded.
+
+    sigrok-cli output is ASCII; callers that feed it straight to the bytes
+    parsers in formatters skip a full UTF-8 decode pass.
+
+    If max_bytes is given and stdout grows past it, sigrok-cli is killed and
+    exactly the first max_bytes of stdout are returned. Output that ends at
+    max_bytes or earlier is complete and checked like any other run.
+
+    Runs take a slot of the process-wide sigrok-cli limit unless throttle
+    is False, for runs that mostly wait on hardware rather than use a core.
+
+    Raises SigrokError on non-zero exit code.
+    """
+    if not throttle:
+        return await _exec(args, timeout, max_bytes)
+    async with _subprocess_slots():
+        return await _exec(args, timeout, max_bytes)
+
+
+async def _exec(args: list[str], timeout: float, max_bytes: int | None) -> bytes:
+    """Spawn sigrok-cli and collect its output; see _run_bytes."""
     cmd = [_find_sigrok_cli()] + args
 
     proc = await asyncio.create_subprocess_exec(
@@ -200,28 +442,47 @@ async def _run(
         stderr=asyncio.subprocess.PIPE,
     )
 
+    truncated = False
+
+    async def read_stdout() -> bytearray:
+        nonlocal truncated
+        buf = await _read_all(proc.stdout, max_bytes)
+        if max_bytes is not None and len(buf) > max_bytes:
+            # More output than wanted: stop sigrok-cli instead of draining
+            # the rest.
+            truncated = True
+            if proc.returncode is None:
+                proc.kill()
+            await _discard(proc.stdout)
+            del buf[max_bytes:]
+        return buf
+
     try:
-        stdout_bytes, stderr_bytes = await asyncio.wait_for(
-            proc.communicate(), timeout=timeout
+        stdout_bytes, stderr_bytes, _ = await asyncio.wait_for(
+            asyncio.gather(
+                read_stdout(),
+                _read_all(proc.stderr),
+                proc.wait(),
+            ),
+            timeout=timeout,
         )
     except asyncio.TimeoutError:
         proc.kill()
-        await proc.communicate()
+        await asyncio.gather(_discard(proc.stdout), _discard(proc.stderr), proc.wait())
         raise CaptureError(
             f"sigrok-cli timed out after {timeout}s. Command: {' '.join(cmd)}"
         )
 
-    stdout = stdout_bytes.decode("utf-8", errors="replace")
-    stderr = stderr_bytes.decode("utf-8", errors="replace")
-
-    if proc.returncode != 0:
+    if proc.returncode != 0 and not truncated:
+        # stderr is only needed for the error message.
+        stderr = stderr_bytes.decode("utf-8", errors="replace")
         raise SigrokError(
             f"sigrok-cli exited with code {proc.returncode}.\n"
             f"Command: {' '.join(cmd)}\n"
             f"stderr: {stderr.strip()}"
         )
 
-    return stdout
+    return bytes(stdout_bytes)
 
 
 # ---------------------------------------------------------------------------
@@ -229,27 +490,31 @@ async def _run(
 # ---------------------------------------------------------------------------
 
 
+# sigrok-cli --scan output format:
+#   The following devices were found:
+#   zeroplus-logic-cube - ZeroPlus Logic Cube LAP-C(16128) with 16 channels
+# Every other non-blank line is a device; the description is the whole line,
+# stripped.
+_DEVICE_LINE_RE = re.compile(
+    r"^[^\S\n]*(?!The following)(\S[^\n]*?)[^\S\n]*$", re.MULTILINE
+)
+
+
 async def scan_devices(driver: str = "zeroplus-logic-cube") -> list[dict]:
     """Scan for connected devices using the specified driver.
 
     Returns a list of dicts with keys: driver, description, connection.
     """
+    return await _single_flight(("scan", driver), lambda: _scan_devices(driver))
+
+
+async def _scan_devices(driver: str) -> list[dict]:
     output = await _run(["--driver", driver, "--scan"])
 
-    devices = []
-    # sigrok-cli --scan output format:
-    #   The following devices were found:
-    #   zeroplus-logic-cube - ZeroPlus Logic Cube LAP-C(16128) with 16 channels
-    for line in output.strip().splitlines():
-        line = line.strip()
-        if not line or line.startswith("The following"):
-            continue
-        devices.append(
-            {
-                "driver": driver,
-                "description": line,
-            }
-        )
+    devices = [
+        {"driver": driver, "description": description}
+        for description in _DEVICE_LINE_RE.findall(output)
+    ]
 
     if not devices:
         raise DeviceNotFoundError(
@@ -292,26 +557,26 @@ async def run_capture(
     Returns:
         sigrok-cli stdout (usually empty on success).
     """
-    args = ["--driver", driver, "--config", f"samplerate={sample_rate}"]
-
-    if channels:
-        args += ["--channels", channels]
-
     if num_samples is not None:
-        args += ["--samples", str(num_samples)]
+        limit = ("--samples", str(num_samples))
     elif duration_ms is not None:
-        args += ["--time", str(duration_ms)]
+        limit = ("--time", str(duration_ms))
     else:
         # Default: capture 1024 samples
-        args += ["--samples", "1024"]
-
-    if triggers:
-        args += ["--triggers", triggers]
-
-    if wait_trigger:
-        args += ["--wait-trigger"]
-
-    args += ["--output-file", output_file]
+        limit = ("--samples", "1024")
+
+    args = [
+        "--driver",
+        driver,
+        "--config",
+        f"samplerate={sample_rate}",
+        *(("--channels", channels) if channels else ()),
+        *limit,
+        *(("--triggers", triggers) if triggers else ()),
+        *(("--wait-trigger",) if wait_trigger else ()),
+        "--output-file",
+        output_file,
+    ]
 
     # Compute timeout: trigger waits use trigger_timeout, duration-based
     # captures need at least duration + buffer, otherwise use default.
@@ -323,10 +588,36 @@ async def run_capture(
         timeout = _DEFAULT_TIMEOUT
 
     try:
-        return await _run(args, timeout=timeout)
+        # A capture waits on the device (and possibly a trigger for
+        # trigger_timeout), so it doesn't count against the CPU-bound
+        # decode/export limit.
+        output = await _run(args, timeout=timeout, throttle=False)
     except SigrokError as e:
         raise CaptureError(str(e)) from e
 
+    _prefetch(output_file)
+    return output
+
+
+@functools.lru_cache(maxsize=256)
+def _build_decoder_spec(
+    decoder: str,
+    channel_mapping: tuple[tuple[str, str], ...],
+    decoder_options: tuple[tuple[str, str], ...],
+) -> str:
+    """Build a decoder spec: decoder[:key=val:key=val].
+
+    Takes item tuples rather than dicts so that the spec for a recurring
+    decoder/channel layout is built once; order is kept as given.
+    """
+    return ":".join(
+        [
+            decoder,
+            *(f"{sig}={ch}" for sig, ch in channel_mapping),
+            *(f"{k}={v}" for k, v in decoder_options),
+        ]
+    )
+
 
 async def decode_protocol(
     input_file: str,
@@ -334,6 +625,7 @@ async def decode_protocol(
     decoder_options: dict[str, str] | None = None,
     channel_mapping: dict[str, str] | None = None,
     annotation_filter: str | None = None,
+    cache: bool = True,
 ) -> str:
     """Run a protocol decoder on a captured .sr file.
 
@@ -345,29 +637,31 @@ async def decode_protocol(
             e.g. {"sda": "0", "scl": "1"} or {"rx": "0"}.
         annotation_filter: Annotation filter, e.g. "i2c=data-write" to show
             only specific annotation classes.
+        cache: Keep the output in the in-process result cache. Pass False
+            when the caller caches decodes itself.
 
     Returns:
         Decoded protocol output as text.
     """
-    # Build the decoder spec: decoder[:key=val:key=val]
-    decoder_spec = decoder
-    opts: list[str] = []
-    if channel_mapping:
-        opts += [f"{sig}={ch}" for sig, ch in channel_mapping.items()]
-    if decoder_options:
-        opts += [f"{k}={v}" for k, v in decoder_options.items()]
-    if opts:
-        decoder_spec += ":" + ":".join(opts)
-
-    args = ["-i", input_file, "-P", decoder_spec]
+    decoder_spec = _build_decoder_spec(
+        decoder,
+        tuple((channel_mapping or {}).items()),
+        tuple((decoder_options or {}).items()),
+    )
 
-    if annotation_filter:
-        args += ["-A", annotation_filter]
+    args = [
+        "-i",
+        input_file,
+        "-P",
+        decoder_spec,
+        *(("-A", annotation_filter) if annotation_filter else ()),
+    ]
 
     try:
-        return await _run(args, timeout=30.0)
+        output = await _run_on_file(input_file, args, timeout=30.0, cache=cache)
     except SigrokError as e:
         raise DecoderError(str(e)) from e
+    return output.decode("utf-8", errors="replace")
 
 
 async def list_decoders() -> list[dict]:
@@ -375,26 +669,28 @@ async def list_decoders() -> list[dict]:
 
     Returns a list of dicts with keys: id, description.
     """
+    return await _single_flight(("decoders",), _list_decoders)
+
+
+async def _list_decoders() -> list[dict]:
     output = await _run(["--list-supported"])
 
     decoders = []
     in_decoders = False
 
+    # One pass over the lines: the decoder section starts with "Supported
+    # protocol decoders:" and ends when a new "Supported ..." header appears.
     for line in output.splitlines():
-        # The decoder section starts with "Supported protocol decoders:"
-        if "protocol decoders" in line.lower():
-            in_decoders = True
+        if line.startswith("Supported "):
+            if in_decoders:
+                break
+            in_decoders = line.startswith("Supported protocol decoders")
             continue
-        # Sections end when a new "Supported ..." header appears
-        if in_decoders and line.startswith("Supported "):
-            break
-        if in_decoders and line.strip():
+        if in_decoders:
             # Format: "  i2c       Inter-Integrated Circuit"
-            parts = line.strip().split(None, 1)
-            if len(parts) == 2:
-                decoders.append({"id": parts[0], "description": parts[1]})
-            elif len(parts) == 1:
-                decoders.append({"id": parts[0], "description": ""})
+            dec_id, _, description = line.strip().partition(" ")
+            if dec_id:
+                decoders.append({"id": dec_id, "description": description.lstrip()})
 
     return decoders
 
@@ -403,19 +699,34 @@ async def export_data(
     input_file: str,
     output_format: str = "bits",
     channels: str | None = None,
-) -> str:
+    max_bytes: int | None = None,
+    decode: bool = True,
+    cache: bool = True,
+) -> str | bytes:
     """Export captured data in a text format.
 
+    sigrok-cli can't export a sample range from a capture file, so the
+    whole capture is rendered; max_bytes bounds how much of it is read.
+
     Args:
         input_file: Path to the .sr capture file.
         output_format: One of "bits", "hex", "ascii", "csv".
         channels: Optional channel filter.
+        max_bytes: Stop sigrok-cli once this much output has been read and
+            return exactly the first max_bytes.
+        decode: Return str. Pass False to get the raw ASCII bytes for the
+            bytes-aware formatters and skip decoding a large export.
+        cache: Keep the output in the in-process result cache. Pass False
+            when the caller keeps the export itself.
 
     Returns:
-        Formatted data as text.
+        Formatted data as text (bytes if decode is False).
     """
     args = ["-i", input_file, "--output-format", output_format]
     if channels:
         args += ["--channels", channels]
 
-    return await _run(args, timeout=30.0)
+    output = await _run_on_file(
+        input_file, args, timeout=30.0, max_bytes=max_bytes, cache=cache
+    )
+    return output.decode("utf-8", errors="replace") if decode else output
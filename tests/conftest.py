@@ -8,6 +8,14 @@ import pytest
 FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
 
 
+def pytest_configure(config):
+    # pytest-xdist registers this mark itself; declare it too so the suite
+    # runs without warnings when xdist isn't installed.
+    config.addinivalue_line(
+        "markers", "xdist_group(name): run tests with the same name on one worker"
+    )
+
+
 @pytest.fixture
 def fixtures_dir():
     return FIXTURES_DIR
@@ -0,0 +1,137 @@
+"""Unit tests for CaptureStore."""
+
+import os
+import time
+
+import pytest
+
+from sigrok_logicanalyzer_mcp import capture_store
+from sigrok_logicanalyzer_mcp.capture_store import CaptureNotFoundError, CaptureStore
+from sigrok_logicanalyzer_mcp.formatters import LineIndex
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = CaptureStore(base_dir=str(tmp_path / "captures"))
+    yield s
+    s.cleanup()
+
+
+def test_new_capture_ids(store):
+    first, path1 = store.new_capture()
+    second, _ = store.new_capture(description="uart bus")
+
+    assert first == "cap_001"
+    assert second == "cap_002"
+    assert path1.endswith("cap_001.sr")
+    assert store.get(second).description == "uart bus"
+
+
+def test_get_unknown_capture(store):
+    store.new_capture()
+    with pytest.raises(CaptureNotFoundError, match="cap_001"):
+        store.get("cap_999")
+
+
+def test_list_captures_uses_recorded_size(store):
+    capture_id, path = store.new_capture()
+    with open(path, "wb") as f:
+        f.write(b"x" * 10)
+
+    assert store.list_captures()[0]["size_bytes"] == 10
+
+    store.record_size(capture_id, 1234)
+    assert store.list_captures()[0]["size_bytes"] == 1234
+
+
+def test_list_captures_created_at_is_wall_clock(store):
+    before = time.time()
+    store.new_capture()
+    after = time.time()
+
+    created_at = store.list_captures()[0]["created_at"]
+    assert before - 1 <= created_at <= after + 1
+
+
+def test_list_captures_missing_file(store):
+    store.new_capture()
+    assert store.list_captures()[0]["size_bytes"] == 0
+
+
+def test_line_index_cache(store):
+    capture_id, _ = store.new_capture()
+    index = LineIndex("A0:1\nA0:0")
+
+    assert store.get_line_index(capture_id, "bits", None) is None
+    store.cache_line_index(capture_id, "bits", None, index)
+    assert store.get_line_index(capture_id, "bits", None) is index
+    assert store.get_line_index(capture_id, "bits", "A0") is None
+
+    with pytest.raises(CaptureNotFoundError):
+        store.cache_line_index("cap_999", "bits", None, index)
+
+
+def test_line_index_cache_is_bounded_by_bytes(store, monkeypatch):
+    capture_id, _ = store.new_capture()
+    first = LineIndex("A0:1")
+    monkeypatch.setattr(capture_store, "_MAX_LINE_INDEX_BYTES", 2 * first.nbytes)
+
+    store.cache_line_index(capture_id, "bits", None, first)
+    store.cache_line_index(capture_id, "hex", None, LineIndex("A0:0"))
+    store.cache_line_index(capture_id, "csv", None, LineIndex("A0,1"))  # evicts
+    assert store.get_line_index(capture_id, "bits", None) is None
+    assert store.get_line_index(capture_id, "csv", None) is not None
+
+    # Too large to keep at all.
+    store.cache_line_index(capture_id, "bits", "A0", LineIndex("A0:1\n" * 10))
+    assert store.get_line_index(capture_id, "bits", "A0") is None
+    assert store.get_line_index(capture_id, "hex", None) is not None
+
+
+def test_decode_cache(store):
+    capture_id, _ = store.new_capture()
+    assert store.get_cached_decode(capture_id, "uart_1") is None
+
+    path = store.cache_decode(capture_id, "uart_1", "uart-1: 48\n")
+    os.remove(path)  # served from memory without re-reading the file
+
+    assert store.get_cached_decode(capture_id, "uart_1") == "uart-1: 48\n"
+    assert store.get_cached_decode(capture_id, "uart_2") is None
+
+
+def test_decode_cache_memory_is_bounded(store, monkeypatch):
+    monkeypatch.setattr(capture_store, "_MAX_DECODE_CACHE_CHARS", 10)
+    capture_id, _ = store.new_capture()
+
+    first = store.cache_decode(capture_id, "a", "12345")
+    store.cache_decode(capture_id, "b", "67890")
+    store.cache_decode(capture_id, "c", "abcde")  # evicts "a" from memory
+    os.remove(first)
+
+    assert store.get_cached_decode(capture_id, "a") is None
+    assert store.get_cached_decode(capture_id, "c") == "abcde"
+
+    # Too large for memory, still served from disk.
+    store.cache_decode(capture_id, "big", "x" * 11)
+    assert store.get_cached_decode(capture_id, "big") == "x" * 11
+
+
+def test_cleanup_owned_dir():
+    s = CaptureStore()
+    _, path = s.new_capture()
+    with open(path, "wb") as f:
+        f.write(b"data")
+
+    s.cleanup()
+
+    assert not os.path.exists(s.base_dir)
+    assert s.list_captures() == []
+
+
+def test_cleanup_owned_dir_with_subdirectory():
+    s = CaptureStore()
+    os.mkdir(os.path.join(s.base_dir, "stray"))
+
+    s.cleanup()
+
+    assert not os.path.exists(s.base_dir)
@@ -0,0 +1,160 @@
+"""Unit tests for the output formatters (no sigrok-cli required)."""
+
+import random
+
+from sigrok_logicanalyzer_mcp.formatters import (
+    LineIndex,
+    _bit_stats,
+    _parse_annotations,
+    _render_ascii,
+    format_decoded_protocol,
+    format_raw_samples,
+    format_uart_transactions,
+    format_usb_transactions,
+    summarize_capture_data,
+)
+
+BITS_OUTPUT = """\
+libsigrok 0.5.2
+Acquisition with 3/16 channels at 1 MHz
+A0:00001111 00001111
+A1:11111111 11111111
+A2:00000000 00000000
+A0:0101
+A1:1111
+A2:0000
+"""
+
+
+def test_bit_stats_matches_naive_loop():
+    rng = random.Random(1234)
+    for n in (0, 1, 2, 3, 63, 64, 65, 1000):
+        bits = "".join(rng.choice("01") for _ in range(n))
+        edges = sum(1 for i in range(1, n) if bits[i] != bits[i - 1])
+        assert _bit_stats(bits) == (bits.count("1"), edges)
+
+
+def test_bit_stats_leading_zeros():
+    assert _bit_stats("0001") == (1, 1)
+    assert _bit_stats("0000") == (0, 0)
+    assert _bit_stats(b"1000") == (1, 1)
+
+
+def test_summarize_capture_data():
+    result = summarize_capture_data(BITS_OUTPUT)
+    lines = result.splitlines()
+
+    assert lines[0] == "Capture summary: 20 samples, 3 channels"
+    a0 = next(line for line in lines if line.startswith("A0"))
+    a1 = next(line for line in lines if line.startswith("A1"))
+    a2 = next(line for line in lines if line.startswith("A2"))
+    # 00001111 00001111 0101 -> 3 edges in the first 16, 1 at the join, 3 after
+    assert a0.split()[2] == "7"
+    assert "active" in a0
+    assert "always high" in a1
+    assert "always low" in a2
+
+
+def test_summarize_capture_data_bytes():
+    assert summarize_capture_data(BITS_OUTPUT.encode()) == summarize_capture_data(
+        BITS_OUTPUT
+    )
+
+
+def test_summarize_capture_data_keeps_label_spaces():
+    result = summarize_capture_data(" CS # :0101 1010 \n\tCS # :11\n")
+    lines = result.splitlines()
+
+    assert lines[0] == "Capture summary: 10 samples, 1 channels"
+    assert lines[-1].startswith("CS #  ")
+
+
+def test_summarize_capture_data_empty():
+    assert summarize_capture_data("") == "No sample data to summarize."
+    assert "could not parse" in summarize_capture_data("libsigrok 0.5.2\n")
+
+
+def test_format_raw_samples_window():
+    raw = "".join(f"A0:{i:08b}\n" for i in range(10))
+    result = format_raw_samples(raw, start_sample=2, window_size=3)
+
+    assert result == (
+        "Samples 2-4 of 10 total (showing 3 samples):\n"
+        "A0:00000010\nA0:00000011\nA0:00000100"
+    )
+    assert format_raw_samples(raw.encode(), start_sample=2, window_size=3) == result
+
+
+def test_line_index_windows():
+    index = LineIndex(b"A0:1\r\nA0:0\r\n\r\nA0:1\r\n")
+
+    assert len(index) == 4
+    assert index.window(0, 2) == "A0:1\nA0:0"
+    assert index.window(2, 4) == "\nA0:1"
+    assert len(LineIndex("  \n")) == 0
+
+
+def test_format_decoded_protocol():
+    raw = "uart-1: 48\nuart-1: 65\nuart-1: 6C\n"
+    assert format_decoded_protocol(raw) == (
+        "Decoded 3 annotations:\n\nuart-1: 48\nuart-1: 65\nuart-1: 6C"
+    )
+    assert format_decoded_protocol(raw.encode()) == format_decoded_protocol(raw)
+
+
+def test_format_decoded_protocol_truncates():
+    raw = "".join(f"i2c-1: Data write: {i:02X}\n" for i in range(10))
+    result = format_decoded_protocol(raw, max_lines=3)
+
+    assert result.startswith("Decoded 10 annotations (showing first 3):")
+    assert "Data write: 02" in result
+    assert "Data write: 03" not in result
+    assert result.endswith("... (7 more lines truncated)")
+
+
+def test_format_decoded_protocol_no_lines():
+    raw = "uart-1: 48\nuart-1: 65\n"
+    assert format_decoded_protocol(raw, max_lines=0) == (
+        "Decoded 2 annotations (showing first 0):\n\n\n\n... (2 more lines truncated)"
+    )
+
+
+def test_format_decoded_protocol_empty():
+    assert format_decoded_protocol("\n  \n").startswith("No protocol data decoded")
+
+
+def test_parse_annotations():
+    raw = "i2c-1: Start\r\n\n  i2c-1: Data write: 3C  \ni2c-1:\nnoise\n"
+    assert _parse_annotations(raw) == ["Start", "Data write: 3C"]
+    assert _parse_annotations(raw.encode()) == ["Start", "Data write: 3C"]
+
+
+def test_render_ascii():
+    assert _render_ascii(["48", "69", "0a", "7F"]) == "Hi.."
+    assert _render_ascii(["1FF", "41"]) == ".A"
+    assert _render_ascii(["48", "zz"]) == ""
+
+
+def test_format_uart_transactions():
+    raw = "uart-1: TX data: 48\nuart-1: TX data: 69\nuart-1: RX data: 06\n"
+    assert format_uart_transactions(raw) == (
+        'UART: 3 bytes in 2 segments\n\nTX> 48 69  "Hi"\nRX< 06  "."'
+    )
+
+
+def test_format_usb_transactions_filters_sofs():
+    raw = "".join(
+        f"usb_packet-1: {ann}\n"
+        for ann in (
+            "SOF 1128",
+            "SYNC: 00000001",
+            "IN ADDR 2 EP 1",
+            "DATA1 [ 01 02 ]",
+            "ACK",
+            "SOF 1129",
+        )
+    )
+    assert format_usb_transactions(raw) == (
+        "USB: 1 transactions (2 SOFs filtered)\n\n"
+        "#001  IN ADDR 2 EP 1 DATA1 [ 01 02 ] ACK"
+    )
@@ -1,8 +1,11 @@
 """Integration tests using sigrok-cli against .sr fixture files."""
 
+import functools
 import os
 import subprocess
 
+import pytest
+
 from tests.conftest import skip_no_sigrok, FIXTURES_DIR
 from sigrok_logicanalyzer_mcp.formatters import (
     format_i2c_transactions,
@@ -21,16 +24,46 @@ from sigrok_logicanalyzer_mcp.formatters import (
 )
 
 
+@functools.lru_cache(maxsize=64)
 def _decode(fixture, decoder_spec, annotation_filter=None):
-    """Run sigrok-cli on a fixture file and return stdout."""
+    """Run sigrok-cli on a fixture file and return stdout as bytes.
+
+    Results are memoized for the session, so tests sharing a fixture and
+    decoder stack only pay for one sigrok-cli run.
+    """
     args = ["sigrok-cli", "-i", os.path.join(FIXTURES_DIR, fixture), "-P", decoder_spec]
     if annotation_filter:
         args += ["-A", annotation_filter]
-    result = subprocess.run(args, capture_output=True, text=True)
-    assert result.returncode == 0, f"sigrok-cli failed: {result.stderr}"
+    result = subprocess.run(args, capture_output=True)
+    assert result.returncode == 0, f"sigrok-cli failed: {result.stderr.decode()}"
     return result.stdout
 
 
+def _decode_split(fixture, decoder_spec, annotation_filter):
+    """Decode a stacked spec once and split stdout by decoder id.
+
+    sigrok-cli prefixes each annotation with ``<decoder>-<n>:``, so one run
+    of e.g. ``spi,spiflash`` yields the output of both decoders.
+    """
+    streams = {}
+    for line in _decode(fixture, decoder_spec, annotation_filter).splitlines(True):
+        decoder = line.partition(b":")[0].rpartition(b"-")[0].decode()
+        streams.setdefault(decoder, []).append(line)
+    return {decoder: b"".join(lines) for decoder, lines in streams.items()}
+
+
+MX25L1605D_DECODE = (
+    "mx25l1605d_read.sr",
+    "spi:clk=SCLK:mosi=MOSI:miso=MISO:cs=CS#,spiflash",
+    "spi=mosi-data:miso-data:mosi-transfer:miso-transfer,spiflash",
+)
+
+# Tests sharing a memoized decode run on the same xdist worker
+# (CI runs with --dist loadgroup), so the decode still happens only once.
+same_decode_as_mx25l1605d = pytest.mark.xdist_group("mx25l1605d")
+same_decode_as_lan8720a = pytest.mark.xdist_group("lan8720a_mdio")
+
+
 @skip_no_sigrok
 class TestProtocolDecode:
     def test_i2c(self):
@@ -43,12 +76,9 @@ class TestProtocolDecode:
         assert "transactions" in result
         assert "W 0x" in result or "R 0x" in result
 
+    @same_decode_as_mx25l1605d
     def test_spi(self):
-        raw = _decode(
-            "mx25l1605d_read.sr",
-            "spi:clk=SCLK:mosi=MOSI:miso=MISO:cs=CS#",
-            "spi=mosi-data:miso-data:mosi-transfer:miso-transfer",
-        )
+        raw = _decode_split(*MX25L1605D_DECODE)["spi"]
         result = format_spi_transactions(raw)
         assert "SPI" in result
 
@@ -81,6 +111,7 @@ class TestProtocolDecode:
         assert "transactions" in result
         assert "ROM" in result
 
+    @same_decode_as_lan8720a
     def test_mdio(self):
         raw = _decode(
             "lan8720a_read_write_read.sr",
@@ -134,12 +165,9 @@ class TestProtocolDecode:
         assert "AVR ISP" in result
         assert "ATmega88" in result
 
+    @same_decode_as_mx25l1605d
     def test_spiflash(self):
-        raw = _decode(
-            "mx25l1605d_read.sr",
-            "spi:clk=SCLK:mosi=MOSI:miso=MISO:cs=CS#,spiflash",
-            "spiflash",
-        )
+        raw = _decode_split(*MX25L1605D_DECODE)["spiflash"]
         result = format_spiflash_transactions(raw)
         assert "SPI Flash" in result
         assert "READ" in result
@@ -154,6 +182,7 @@ class TestProtocolDecode:
         assert "SD Card" in result
         assert len(raw) > 0
 
+    @same_decode_as_lan8720a
     def test_format_decoded_summary_dispatch(self):
         """Verify format_decoded_summary dispatches to the right formatter."""
         raw = _decode(
@@ -0,0 +1,198 @@
+"""Tests for the MCP tool functions in server (no sigrok-cli required)."""
+
+import os
+import time
+from types import SimpleNamespace
+
+import anyio
+import pytest
+
+from sigrok_logicanalyzer_mcp import server
+from sigrok_logicanalyzer_mcp.capture_store import CaptureStore
+
+
+def _ctx(store=None):
+    return SimpleNamespace(
+        request_context=SimpleNamespace(lifespan_context=SimpleNamespace(store=store))
+    )
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("sda=A0,scl=A1", {"sda": "A0", "scl": "A1"}),
+        (" rx = A2 , baudrate= 115200 ", {"rx": "A2", "baudrate": "115200"}),
+        ("format=hex=1", {"format": "hex=1"}),
+        ("rx=A0,,tx", {"rx": "A0"}),
+        ("cs=", {"cs": ""}),
+        # Malformed keys are passed through for sigrok-cli to reject.
+        ("chip select=CS", {"chip select": "CS"}),
+        ("=x", {"": "x"}),
+    ],
+)
+def test_parse_key_value_pairs(text, expected):
+    assert server._parse_key_value_pairs(text) == expected
+
+
+def test_parse_key_value_pairs_is_memoised():
+    server._parse_kv.cache_clear()
+    first = server._parse_key_value_pairs("rx=A0")
+    first["rx"] = "changed"  # callers get their own dict
+
+    assert server._parse_key_value_pairs("rx=A0") == {"rx": "A0"}
+    assert server._parse_kv.cache_info().hits == 1
+
+
+@pytest.mark.asyncio
+async def test_decode_protocols(monkeypatch):
+    calls = []
+
+    async def fake_run_decode(
+        store, capture_id, protocol, channel_mapping, options, annotation_filter, detail
+    ):
+        calls.append((capture_id, protocol, channel_mapping, options, detail))
+        return f"{protocol} result"
+
+    monkeypatch.setattr(server, "_run_decode", fake_run_decode)
+    result = await server.decode_protocols(
+        _ctx(),
+        "cap_001",
+        ["uart", "i2c", "uart"],
+        channel_mappings={"i2c": "sda=A0,scl=A1", "uart": "rx=A2"},
+        options={"uart": "baudrate=115200"},
+        detail="raw",
+    )
+
+    assert result == "=== uart ===\nuart result\n\n=== i2c ===\ni2c result"
+    assert calls == [
+        ("cap_001", "uart", "rx=A2", "baudrate=115200", "raw"),
+        ("cap_001", "i2c", "sda=A0,scl=A1", None, "raw"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_decode_protocols_empty():
+    result = await server.decode_protocols(_ctx(), "cap_001", [])
+    assert result.startswith("No protocols given.")
+
+
+@pytest.mark.asyncio
+async def test_get_raw_samples_indexes_export_once(tmp_path, monkeypatch):
+    calls = []
+
+    async def fake_export_data(**kwargs):
+        calls.append(kwargs)
+        return b"A0:01\nA0:10\n"
+
+    monkeypatch.setattr(server.sigrok_cli, "export_data", fake_export_data)
+    store = CaptureStore(base_dir=str(tmp_path))
+    capture_id, _ = store.new_capture()
+    try:
+        first = await server.get_raw_samples(_ctx(store), capture_id, 0, 1)
+        second = await server.get_raw_samples(_ctx(store), capture_id, 1, 1)
+    finally:
+        store.cleanup()
+
+    assert "A0:01" in first
+    assert "A0:10" in second
+    assert len(calls) == 1
+    assert calls[0]["cache"] is False
+
+
+@pytest.mark.asyncio
+async def test_decode_reuses_store_only_for_same_invocation(tmp_path, monkeypatch):
+    calls = []
+
+    async def fake_decode_protocol(**kwargs):
+        calls.append(kwargs)
+        return "uart-1: 48\n"
+
+    monkeypatch.setattr(server.sigrok_cli, "decode_protocol", fake_decode_protocol)
+    store = CaptureStore(base_dir=str(tmp_path))
+    capture_id, _ = store.new_capture()
+
+    async def decode(mapping="rx=A0", options=None, annotation_filter=None):
+        return await server._run_decode(
+            store, capture_id, "uart", mapping, options, annotation_filter, "raw"
+        )
+
+    try:
+        await decode()
+        await decode()
+        assert len(calls) == 1
+
+        await decode(mapping="rx=A1")
+        await decode(options="baudrate=9600")
+        await decode(annotation_filter="uart=rx-data")
+        assert len(calls) == 4
+
+        await decode(mapping="rx=A1")
+        assert len(calls) == 4
+    finally:
+        store.cleanup()
+
+    assert calls[1]["channel_mapping"] == {"rx": "A1"}
+    assert calls[2]["decoder_options"] == {"baudrate": "9600"}
+    assert calls[3]["annotation_filter"] == "uart=rx-data"
+    assert all(call["cache"] is False for call in calls)
+
+
+async def _analyze(tmp_path, monkeypatch, export, limit):
+    async def fake_export_data(max_bytes=None, **kwargs):
+        return export[:max_bytes]
+
+    monkeypatch.setattr(server, "_ANALYZE_MAX_BYTES", limit)
+    monkeypatch.setattr(server.sigrok_cli, "export_data", fake_export_data)
+    store = CaptureStore(base_dir=str(tmp_path))
+    capture_id, _ = store.new_capture()
+    try:
+        return await server.analyze_capture(_ctx(store), capture_id)
+    finally:
+        store.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_analyze_capture_truncated(tmp_path, monkeypatch):
+    export = b"A0:0101\nA1:1100\n"
+    result = await _analyze(tmp_path, monkeypatch, export, limit=12)
+
+    # The partial "A1:1" line is dropped rather than summarized.
+    assert "1 channels" in result
+    assert "A1" not in result
+    assert result.endswith("were analyzed; the capture is larger.")
+
+
+@pytest.mark.asyncio
+async def test_analyze_capture_exactly_at_limit(tmp_path, monkeypatch):
+    export = b"A0:0101\nA1:1100\n"
+    result = await _analyze(tmp_path, monkeypatch, export, limit=len(export))
+
+    assert "2 channels" in result
+    assert "Note:" not in result
+
+
+@pytest.mark.asyncio
+async def test_lifespan_cleans_up_when_cancelled(monkeypatch):
+    original_cleanup = server.CaptureStore.cleanup
+    forgotten = []
+
+    def slow_cleanup(self):
+        time.sleep(0.05)  # still running when the cancellation lands
+        original_cleanup(self)
+
+    monkeypatch.setattr(server.CaptureStore, "cleanup", slow_cleanup)
+    monkeypatch.setattr(server.sigrok_cli, "forget_results", forgotten.append)
+
+    async def serve():
+        async with server.app_lifespan(server.mcp) as app:
+            base_dirs.append(app.store.base_dir)
+            await anyio.sleep_forever()
+
+    base_dirs = []
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(serve)
+        await anyio.sleep(0.01)
+        tg.cancel_scope.cancel()
+
+    assert forgotten == base_dirs
+    assert not os.path.exists(base_dirs[0])
@@ -0,0 +1,394 @@
+"""Tests for sigrok_cli with a mocked sigrok-cli subprocess."""
+
+import asyncio
+import itertools
+import re
+from unittest.mock import patch
+
+import pytest
+
+from sigrok_logicanalyzer_mcp import sigrok_cli
+
+LIST_SUPPORTED_OUTPUT = """\
+Supported hardware drivers:
+  demo                 Demo driver and pattern generator
+  fx2lafw              fx2lafw (generic driver for FX2 based LAs)
+
+Supported protocol decoders:
+  i2c                  Inter-Integrated Circuit
+  spi                  Serial Peripheral Interface
+  uart                 Universal Asynchronous Receiver/Transmitter
+
+Supported output formats:
+  bits                 ASCII rendering with 0/1
+"""
+
+
+def _stream(data):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+class FakeProc:
+    """Minimal stand-in for asyncio.subprocess.Process."""
+
+    def __init__(self, stdout=b"", stderr=b"", returncode=0):
+        self.stdout = _stream(stdout)
+        self.stderr = _stream(stderr)
+        self.returncode = returncode
+
+    def kill(self):
+        pass
+
+    async def wait(self):
+        return self.returncode
+
+
+def _mock_process(stdout="", stderr="", returncode=0):
+    return FakeProc(stdout.encode(), stderr.encode(), returncode)
+
+
+def _arg_map(args):
+    """Map each command-line flag to the argument following it."""
+    return {
+        flag: value for flag, value in itertools.pairwise(args) if flag.startswith("-")
+    }
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _patch_which():
+    sigrok_cli._find_sigrok_cli.cache_clear()
+    with patch("shutil.which", return_value="/usr/bin/sigrok-cli"):
+        yield
+    sigrok_cli._find_sigrok_cli.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_result_cache():
+    yield
+    sigrok_cli._result_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_scan_devices_found():
+    proc = _mock_process(
+        "The following devices were found:\n"
+        "zeroplus-logic-cube - ZeroPlus Logic Cube LAP-C(16128) with 16 channels\n"
+    )
+    with patch("asyncio.create_subprocess_exec", return_value=proc):
+        devices = await sigrok_cli.scan_devices()
+
+    assert len(devices) == 1
+    assert devices[0]["driver"] == "zeroplus-logic-cube"
+    assert "LAP-C(16128)" in devices[0]["description"]
+
+
+def test_parser_patterns_are_precompiled():
+    assert isinstance(sigrok_cli._DEVICE_LINE_RE, re.Pattern)
+
+
+@pytest.mark.asyncio
+async def test_scan_devices_none():
+    with (
+        patch("asyncio.create_subprocess_exec", return_value=_mock_process("")),
+        pytest.raises(sigrok_cli.DeviceNotFoundError),
+    ):
+        await sigrok_cli.scan_devices()
+
+
+@pytest.mark.asyncio
+async def test_list_decoders():
+    proc = _mock_process(LIST_SUPPORTED_OUTPUT)
+    with patch("asyncio.create_subprocess_exec", return_value=proc):
+        decoders = await sigrok_cli.list_decoders()
+
+    assert [d["id"] for d in decoders] == ["i2c", "spi", "uart"]
+    assert decoders[0]["description"] == "Inter-Integrated Circuit"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_list_decoders_share_subprocess():
+    proc = _mock_process(LIST_SUPPORTED_OUTPUT)
+    with patch("asyncio.create_subprocess_exec", return_value=proc) as mock_exec:
+        first, second = await asyncio.gather(
+            sigrok_cli.list_decoders(), sigrok_cli.list_decoders()
+        )
+
+    assert mock_exec.call_count == 1
+    assert first == second
+
+
+@pytest.mark.asyncio
+async def test_run_capture_basic():
+    with patch(
+        "asyncio.create_subprocess_exec", return_value=_mock_process()
+    ) as mock_exec:
+        await sigrok_cli.run_capture(
+            "/tmp/cap.sr", channels="A0,A1", sample_rate="2m", triggers="A0=r"
+        )
+
+    call_args = mock_exec.call_args.args
+    args = _arg_map(call_args)
+    assert call_args[0] == "/usr/bin/sigrok-cli"
+    assert "--driver" in args
+    assert args["--config"] == "samplerate=2m"
+    assert args["--channels"] == "A0,A1"
+    assert args["--samples"] == "1024"
+    assert args["--triggers"] == "A0=r"
+    assert "--wait-trigger" not in args
+    assert call_args[-2:] == ("--output-file", "/tmp/cap.sr")
+
+
+@pytest.mark.asyncio
+async def test_decode_i2c():
+    proc = _mock_process("i2c-1: Start\n")
+    with patch("asyncio.create_subprocess_exec", return_value=proc) as mock_exec:
+        out = await sigrok_cli.decode_protocol(
+            "/tmp/cap.sr",
+            "i2c",
+            decoder_options={"address_format": "unshifted"},
+            channel_mapping={"sda": "0", "scl": "1"},
+            annotation_filter="i2c=data-write",
+        )
+
+    assert out == "i2c-1: Start\n"
+    args = _arg_map(mock_exec.call_args[0])
+    assert args["-P"] == "i2c:sda=0:scl=1:address_format=unshifted"
+    assert args["-A"] == "i2c=data-write"
+
+
+@pytest.mark.asyncio
+async def test_repeated_decode_is_cached(tmp_path):
+    capture = tmp_path / "cap.sr"
+    capture.write_bytes(b"capture")
+
+    async def fake_exec(*cmd, **kwargs):
+        return _mock_process("uart-1: 48\n")
+
+    with patch("asyncio.create_subprocess_exec", side_effect=fake_exec) as mock_exec:
+        first = await sigrok_cli.decode_protocol(str(capture), "uart")
+        second = await sigrok_cli.decode_protocol(str(capture), "uart")
+        assert mock_exec.call_count == 1
+
+        await sigrok_cli.decode_protocol(str(capture), "uart", {"baudrate": "9600"})
+        assert mock_exec.call_count == 2
+
+        # Rewriting the capture file invalidates its cached output.
+        capture.write_bytes(b"new capture data")
+        await sigrok_cli.decode_protocol(str(capture), "uart")
+        assert mock_exec.call_count == 3
+
+    assert first == second == "uart-1: 48\n"
+
+
+@pytest.mark.asyncio
+async def test_uncached_decode_is_not_stored(tmp_path):
+    capture = tmp_path / "cap.sr"
+    capture.write_bytes(b"capture")
+
+    async def fake_exec(*cmd, **kwargs):
+        return _mock_process("uart-1: 48\n")
+
+    with patch("asyncio.create_subprocess_exec", side_effect=fake_exec) as mock_exec:
+        await sigrok_cli.decode_protocol(str(capture), "uart", cache=False)
+        await sigrok_cli.decode_protocol(str(capture), "uart", cache=False)
+
+    assert mock_exec.call_count == 2
+    assert len(sigrok_cli._result_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_uncached_export_is_not_stored(tmp_path):
+    capture = tmp_path / "cap.sr"
+    capture.write_bytes(b"capture")
+
+    with patch(
+        "asyncio.create_subprocess_exec", return_value=_mock_process("A0:0101\n")
+    ):
+        raw = await sigrok_cli.export_data(str(capture), decode=False, cache=False)
+
+    assert raw == b"A0:0101\n"
+    assert len(sigrok_cli._result_cache) == 0
+
+
+def test_result_cache_is_bounded_by_bytes():
+    cache = sigrok_cli._ResultCache(max_bytes=10)
+    cache.put(("/a.sr",), b"1234")
+    cache.put(("/b.sr",), b"5678")
+    assert cache.get(("/a.sr",)) == b"1234"  # now most recently used
+
+    cache.put(("/c.sr",), b"9abc")
+    assert cache.get(("/b.sr",)) is None
+    assert len(cache) == 2
+
+    cache.put(("/d.sr",), b"x" * 11)  # larger than the whole cache
+    assert cache.get(("/d.sr",)) is None
+    assert len(cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_forget_results_drops_entries_under_directory(tmp_path):
+    capture = tmp_path / "cap.sr"
+    capture.write_bytes(b"capture")
+
+    async def fake_exec(*cmd, **kwargs):
+        return _mock_process("uart-1: 48\n")
+
+    with patch("asyncio.create_subprocess_exec", side_effect=fake_exec) as mock_exec:
+        await sigrok_cli.decode_protocol(str(capture), "uart")
+        sigrok_cli.forget_results(str(tmp_path / "other"))
+        await sigrok_cli.decode_protocol(str(capture), "uart")
+        assert mock_exec.call_count == 1
+
+        sigrok_cli.forget_results(str(tmp_path))
+        await sigrok_cli.decode_protocol(str(capture), "uart")
+        assert mock_exec.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_subprocess_concurrency_is_limited(monkeypatch):
+    monkeypatch.setattr(sigrok_cli, "_MAX_SUBPROCESSES", 2)
+    running = 0
+    peak = 0
+
+    async def fake_exec(*cmd, **kwargs):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        proc = _mock_process("uart-1: 48\n")
+
+        async def wait():
+            nonlocal running
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        proc.wait = wait
+        return proc
+
+    specs = [
+        {"decoder": "uart", "decoder_options": {"baudrate": str(b)}} for b in range(6)
+    ]
+    with patch("asyncio.create_subprocess_exec", side_effect=fake_exec):
+        results = await asyncio.gather(
+            *(sigrok_cli.decode_protocol("/tmp/cap.sr", **spec) for spec in specs)
+        )
+
+    assert len(results) == 6
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_captures_do_not_take_subprocess_slots(monkeypatch):
+    monkeypatch.setattr(sigrok_cli, "_MAX_SUBPROCESSES", 1)
+    capture_started = asyncio.Event()
+    release_capture = asyncio.Event()
+
+    async def fake_exec(*cmd, **kwargs):
+        proc = _mock_process("uart-1: 48\n")
+        if "--output-file" in cmd:
+
+            async def wait():
+                capture_started.set()
+                await release_capture.wait()
+
+            proc.wait = wait
+        return proc
+
+    with patch("asyncio.create_subprocess_exec", side_effect=fake_exec):
+        capture = asyncio.create_task(sigrok_cli.run_capture("/tmp/cap.sr"))
+        await capture_started.wait()
+        # The pending capture must not block a decode.
+        out = await asyncio.wait_for(
+            sigrok_cli.decode_protocol("/tmp/cap.sr", "uart"), timeout=1
+        )
+        release_capture.set()
+        await capture
+
+    assert out == "uart-1: 48\n"
+
+
+@pytest.mark.asyncio
+async def test_large_output_is_read_in_chunks():
+    line = "A0:" + " ".join(["01010101"] * 8) + "\n"
+    big = line * 5000  # several times _READ_CHUNK
+    with patch("asyncio.create_subprocess_exec", return_value=_mock_process(big)):
+        out = await sigrok_cli.export_data("/tmp/cap.sr")
+
+    assert out == big
+
+
+@pytest.mark.asyncio
+async def test_export_data_max_bytes():
+    big = "A0:01010101\n" * 50000
+    with patch("asyncio.create_subprocess_exec", return_value=_mock_process(big)):
+        out = await sigrok_cli.export_data("/tmp/cap.sr", max_bytes=100_000)
+
+    assert out == big[:100_000]
+
+
+@pytest.mark.asyncio
+async def test_export_data_max_bytes_exact_output_is_complete():
+    out_text = "A0:01010101\n" * 100
+    proc = _mock_process(out_text, stderr="boom", returncode=1)
+    with (
+        patch("asyncio.create_subprocess_exec", return_value=proc),
+        pytest.raises(sigrok_cli.SigrokError, match="boom"),
+    ):
+        await sigrok_cli.export_data("/tmp/cap.sr", max_bytes=len(out_text))
+
+    proc = _mock_process(out_text)
+    with patch("asyncio.create_subprocess_exec", return_value=proc):
+        out = await sigrok_cli.export_data("/tmp/cap.sr", max_bytes=len(out_text))
+
+    assert out == out_text
+
+
+@pytest.mark.asyncio
+async def test_export_data_undecoded():
+    with patch("asyncio.create_subprocess_exec", return_value=_mock_process("A0:01\n")):
+        out = await sigrok_cli.export_data("/tmp/cap.sr", decode=False)
+
+    assert out == b"A0:01\n"
+
+
+@pytest.mark.asyncio
+async def test_nonzero_exit_raises():
+    proc = _mock_process(stderr="boom", returncode=1)
+    with (
+        patch("asyncio.create_subprocess_exec", return_value=proc),
+        pytest.raises(sigrok_cli.SigrokError, match="boom"),
+    ):
+        await sigrok_cli.list_decoders()
+
+
+def test_find_sigrok_cli_is_cached(monkeypatch):
+    calls = []
+
+    def which(name):
+        calls.append(name)
+        return "/usr/bin/sigrok-cli"
+
+    monkeypatch.setattr("shutil.which", which)
+    sigrok_cli._find_sigrok_cli.cache_clear()
+    try:
+        assert sigrok_cli._find_sigrok_cli() == "/usr/bin/sigrok-cli"
+        assert sigrok_cli._find_sigrok_cli() == "/usr/bin/sigrok-cli"
+    finally:
+        sigrok_cli._find_sigrok_cli.cache_clear()
+
+    assert calls == ["sigrok-cli"]
+
+
+def test_find_sigrok_cli_missing_is_not_cached(monkeypatch):
+    monkeypatch.setattr("shutil.which", lambda name: None)
+    sigrok_cli._find_sigrok_cli.cache_clear()
+    with pytest.raises(sigrok_cli.SigrokNotFoundError):
+        sigrok_cli._find_sigrok_cli()
+
+    monkeypatch.setattr("shutil.which", lambda name: "/opt/bin/sigrok-cli")
+    try:
+        assert sigrok_cli._find_sigrok_cli() == "/opt/bin/sigrok-cli"
+    finally:
+        sigrok_cli._find_sigrok_cli.cache_clear()